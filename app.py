@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+import altair as alt
 from datetime import datetime, timedelta
-from backend import MoodChatAI
+from backend import get_engine
+
+EMOJI = {"POSITIVE": "😊", "NEGATIVE": "😔", "NEUTRAL": "😐"}
 
 # Page configuration
 st.set_page_config(
@@ -31,12 +33,44 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Initialize AI backend
-@st.cache_resource
-def get_ai_engine():
-    return MoodChatAI()
+# Initialize AI backend; the classifier loads in the background so the
+# first page paints immediately and the first analysis finds it ready
+ai = get_engine()
+ai.warmup()
+
+# Analytics are cached on the log signature so reruns skip the pandas scans;
+# date-window queries are also keyed on today so they roll over at midnight
+@st.cache_data(show_spinner=False)
+def _stats(n_rows, last_ts):
+    return ai.get_mood_stats()
+
+@st.cache_data(show_spinner=False)
+def _alert(n_rows, last_ts, today):
+    return ai.check_alert()
 
-ai = get_ai_engine()
+@st.cache_data(show_spinner=False)
+def _report(n_rows, last_ts, today):
+    return ai.export_report()
+
+@st.cache_data(show_spinner=False)
+def _history(n_rows, last_ts, today, days):
+    return ai.get_mood_history(days=days)
+
+# Charts are Vega-Lite specs rendered client-side, so no server rasterization
+def _pie_chart(counts):
+    data = pd.DataFrame({
+        "mood": ["😊 Positive", "😔 Negative", "😐 Neutral"],
+        "count": counts
+    })
+    return alt.Chart(data).mark_arc().encode(
+        theta="count",
+        color=alt.Color(
+            "mood",
+            scale=alt.Scale(range=['#90EE90', '#FFB6C1', '#87CEEB']),
+            sort=None
+        ),
+        tooltip=["mood", "count"]
+    )
 
 # Sidebar navigation
 st.sidebar.title("🧠 Mood-Chat")
@@ -89,8 +123,7 @@ if page == "📝 Log Mood":
                 col1, col2, col3 = st.columns(3)
                 
                 with col1:
-                    emoji = "😊" if mood == "POSITIVE" else "😔" if mood == "NEGATIVE" else "😐"
-                    st.metric(f"{emoji} Detected Mood", mood)
+                    st.metric(f"{EMOJI[mood]} Detected Mood", mood)
                 
                 with col2:
                     st.metric("🎯 Confidence", f"{confidence:.1%}")
@@ -101,7 +134,7 @@ if page == "📝 Log Mood":
                 st.info(f"💡 **Suggestion:** {advice}")
                 
                 # Check for alerts
-                alert, severity, msg = ai.check_alert()
+                alert, severity, msg = _alert(*ai.signature(), datetime.today().date())
                 if alert:
                     if severity == "CRITICAL":
                         st.error(f"🚨 **CRITICAL ALERT:** {msg}\n\nPlease reach out to a mental health professional.")
@@ -116,7 +149,7 @@ if page == "📝 Log Mood":
 elif page == "📊 Dashboard":
     st.title("📊 Your Mood Dashboard")
     
-    stats = ai.get_mood_stats()
+    stats = _stats(*ai.signature())
     
     # Statistics cards
     col1, col2, col3, col4 = st.columns(4)
@@ -156,30 +189,17 @@ elif page == "📊 Dashboard":
         
         with col1:
             st.subheader("Mood Distribution")
-            mood_data = {
-                "😊 Positive": stats['positive_days'],
-                "😔 Negative": stats['negative_days'],
-                "😐 Neutral": stats['neutral_days']
-            }
-            fig, ax = plt.subplots(figsize=(8, 6))
-            colors = ['#90EE90', '#FFB6C1', '#87CEEB']
-            ax.pie(
-                mood_data.values(),
-                labels=mood_data.keys(),
-                autopct='%1.1f%%',
-                colors=colors,
-                startangle=90
-            )
-            st.pyplot(fig)
+            counts = (stats['positive_days'], stats['negative_days'], stats['neutral_days'])
+            st.altair_chart(_pie_chart(counts), use_container_width=True)
         
         with col2:
             st.subheader("Recent Entries")
-            recent = ai.get_mood_history(days=7)
+            recent = _history(*ai.signature(), datetime.today().date(), days=7)
             if len(recent) > 0:
-                for idx, row in recent.tail(5).iterrows():
-                    emoji = "😊" if row['mood'] == "POSITIVE" else "😔" if row['mood'] == "NEGATIVE" else "😐"
-                    st.markdown(f"**{emoji} {row['date'].strftime('%Y-%m-%d')}** - {row['mood']}")
-                    st.caption(row['entry'])
+                rows = recent.tail(5)[['date', 'mood', 'entry']].itertuples(index=False, name=None)
+                for date, mood, entry in rows:
+                    st.markdown(f"**{EMOJI[mood]} {date.strftime('%Y-%m-%d')}** - {mood}")
+                    st.caption(entry)
                     st.divider()
             else:
                 st.info("No entries yet. Start logging to see your history!")
@@ -190,48 +210,24 @@ elif page == "📊 Dashboard":
 elif page == "📈 Analytics":
     st.title("📈 Mood Analytics")
     
-    history = ai.get_mood_history(days=30)
+    history = _history(*ai.signature(), datetime.today().date(), days=30)
     
     if len(history) > 0:
         st.subheader("30-Day Mood Trend")
         
-        # Prepare data for line chart
-        history_sorted = history.sort_values('date')
-        mood_numeric = history_sorted['mood'].map({'POSITIVE': 1, 'NEUTRAL': 0, 'NEGATIVE': -1})
-        
-        fig, ax = plt.subplots(figsize=(12, 5))
-        ax.plot(history_sorted['date'], mood_numeric, marker='o', linestyle='-', linewidth=2, color='#4CAF50')
-        ax.fill_between(history_sorted['date'], mood_numeric, alpha=0.3, color='#4CAF50')
-        ax.set_ylim(-1.5, 1.5)
-        ax.set_yticks([-1, 0, 1])
-        ax.set_yticklabels(['Negative', 'Neutral', 'Positive'])
-        ax.set_xlabel('Date')
-        ax.set_ylabel('Mood')
-        ax.grid(True, alpha=0.3)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        st.pyplot(fig)
+        st.line_chart(history.set_index('date')[['mood_code']])
         
         # Weekly breakdown
         st.subheader("Weekly Breakdown")
-        history_sorted['week'] = history_sorted['date'].dt.isocalendar().week
-        weekly_stats = history_sorted.groupby('week')['mood'].value_counts().unstack(fill_value=0)
+        week = history['date'].dt.isocalendar().week
+        weekly_stats = history.groupby(week)['mood'].value_counts().unstack(fill_value=0)
         
         if len(weekly_stats) > 0:
             st.bar_chart(weekly_stats)
         
         # Confidence trend
         st.subheader("AI Confidence Over Time")
-        fig, ax = plt.subplots(figsize=(12, 4))
-        ax.plot(history_sorted['date'], history_sorted['confidence'], marker='o', color='#FF9800', linewidth=2)
-        ax.fill_between(history_sorted['date'], history_sorted['confidence'], alpha=0.3, color='#FF9800')
-        ax.set_xlabel('Date')
-        ax.set_ylabel('Confidence Score')
-        ax.set_ylim(0, 1)
-        ax.grid(True, alpha=0.3)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        st.pyplot(fig)
+        st.line_chart(history.set_index('date')[['confidence']])
         
         # Insights
         st.markdown("---")
@@ -240,18 +236,18 @@ elif page == "📈 Analytics":
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            best_day = history_sorted[history_sorted['mood'] == 'POSITIVE']
+            best_day = history[history['mood'] == 'POSITIVE']
             if len(best_day) > 0:
                 st.success(f"✨ **Best Day:** {best_day.iloc[-1]['date'].strftime('%Y-%m-%d')}")
             else:
                 st.info("No positive days yet. Stay positive! 💫")
         
         with col2:
-            avg_conf = history_sorted['confidence'].mean()
+            avg_conf = history['confidence'].mean()
             st.info(f"🎯 **Avg AI Confidence:** {avg_conf:.1%}")
         
         with col3:
-            streak_positive = sum(history_sorted.tail(7)['mood'] == 'POSITIVE')
+            streak_positive = sum(history.tail(7)['mood'] == 'POSITIVE')
             st.warning(f"📈 **Positive Days (Last 7):** {streak_positive}/7")
     
     else:
@@ -261,8 +257,10 @@ elif page == "📈 Analytics":
 elif page == "⚠️ Health Alert":
     st.title("⚠️ Health & Alert Status")
     
-    alert, severity, msg = ai.check_alert()
-    report = ai.export_report()
+    report = _report(*ai.signature(), datetime.today().date())
+    alert = report['alert']['triggered']
+    severity = report['alert']['severity']
+    msg = report['alert']['message']
     
     st.markdown("---")
     
@@ -329,9 +327,9 @@ elif page == "ℹ️ About":
     
     ### 🔧 Technology Stack
     
-    - **AI Models:** HuggingFace Transformers (DistilBERT)
+    - **AI Models:** HuggingFace Transformers (distilled TinyBERT)
     - **Frontend:** Streamlit
-    - **Data Storage:** CSV-based local storage
+    - **Data Storage:** Parquet-based local storage
     - **Language:** Python
     
     ### 📊 How It Works
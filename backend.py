@@ -1,121 +1,396 @@
 import os
+import glob
+import shutil
 import json
+import time
+import uuid
+import atexit
+import random
+import threading
+from functools import lru_cache
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datetime import datetime, timedelta
-from transformers import pipeline
 import warnings
 
 warnings.filterwarnings("ignore")
 
+# Avoid tokenizer fork warnings/deadlocks under Streamlit's reloader
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+# Integer mood encoding kept alongside the label for vectorized counting
+MOOD_CODES = {"NEGATIVE": -1, "NEUTRAL": 0, "POSITIVE": 1}
+
+# Column schema of the mood log, both in memory and in the Parquet store.
+# Counting always goes through mood_code; the categoricals keep labels compact.
+DTYPES = {
+    "date": "datetime64[ns]",
+    "entry": "string[pyarrow]",
+    "mood": pd.CategoricalDtype(["NEGATIVE", "NEUTRAL", "POSITIVE"]),
+    "confidence": "float32",
+    "advice": "object",
+    "alert_level": pd.CategoricalDtype(["LOW", "MEDIUM", "HIGH", "CRITICAL"]),
+    "mood_code": "int8"
+}
+
+# Small distilled SST-2 classifier (4-layer TinyBERT, uncased)
+MODEL_NAME = "philschmid/tiny-bert-sst2-distilled"
+
+# Token budget per entry; longer entries are truncated by the tokenizer
+MAX_TOKENS = 256
+
+# Rewrite the store as a single file once appends leave this many parts
+COMPACT_AFTER = 64
+
 class MoodChatAI:
     """
     Advanced AI-powered mood tracking and mental health monitoring system.
     """
     
-    def __init__(self, csv_file="mood_log.csv"):
-        """Initialize the AI pipelines and load/create mood log."""
-        self.csv_file = csv_file
-        self.emotion_analyzer = pipeline(
-            "text-classification",
-            model="distilbert-base-uncased-finetuned-sst-2-english"
-        )
-        self.sentiment_analyzer = pipeline("sentiment-analysis")
+    def __init__(self, store="mood_log.parquet", csv_file="mood_log.csv", flush_every=1):
+        """
+        Load/create mood log; the AI pipeline is loaded on first analysis.
+        The log lives in an append-only Parquet dataset at `store`; an existing
+        CSV log at `csv_file` is imported once when the store does not exist yet.
+        """
+        self.store = store
+        self.flush_every = flush_every
+        
+        # The classifier is loaded on first use or by warmup(), so building
+        # the engine never imports torch/transformers
+        self.emotion_analyzer = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._warmup_thread = None
+        
+        # Per-instance memo of classifier output keyed on normalized text
+        self._infer = lru_cache(maxsize=1024)(self._classify)
         
         # Try to load existing mood log
-        try:
-            self.df = pd.read_csv(csv_file)
-            self.df['date'] = pd.to_datetime(self.df['date'])
-        except FileNotFoundError:
-            self.df = pd.DataFrame(
-                columns=["date", "entry", "mood", "confidence", "advice", "alert_level"]
+        self._recover_compaction()
+        if os.path.isdir(store):
+            # Part order is not guaranteed, and date slicing relies on sorted rows
+            df = pd.read_parquet(store).astype(DTYPES)
+            df = df.sort_values('date', kind='stable', ignore_index=True)
+            if len(glob.glob(os.path.join(store, "*.parquet"))) > COMPACT_AFTER:
+                self._compact(df)
+        elif os.path.exists(csv_file):
+            df = pd.read_csv(
+                csv_file,
+                parse_dates=['date'],
+                date_format='ISO8601',
+                dtype={key: DTYPES[key] for key in ("mood", "alert_level", "confidence")}
             )
+            df['mood_code'] = df['mood'].map(MOOD_CODES)
+            df = df.astype(DTYPES).sort_values('date', kind='stable', ignore_index=True)
+            self._write_part(df)
+        else:
+            df = pd.DataFrame(columns=list(DTYPES)).astype(DTYPES)
+        
+        # Rows are the primary store; the DataFrame is rebuilt lazily on read.
+        # Entries are appended with the current time, so rows stay sorted by date.
+        self._rows = df.to_dict("records")
+        self._pending = []
+        self._write_lock = threading.Lock()
+        self._version = 0
+        self._df_state = (0, df)
+        atexit.register(self.flush)
         
         # Enhanced advice mapping with personalization
+        self._rng = random.Random()
         self.advice_map = {
-            "POSITIVE": [
+            "POSITIVE": (
                 "Amazing! Keep channeling this positive energy! 🌟",
                 "Your optimism is contagious. Share it with others!",
                 "Keep doing what you're doing. You're thriving!"
-            ],
-            "NEGATIVE": [
+            ),
+            "NEGATIVE": (
                 "It's okay to feel down. Consider talking to someone. 💙",
                 "Take a 15-minute walk or practice deep breathing.",
                 "Reach out to a friend or therapist. You're not alone.",
                 "Try journaling or meditation to process these feelings."
-            ],
-            "NEUTRAL": [
+            ),
+            "NEUTRAL": (
                 "Keep journaling daily for better insights! 📝",
                 "How can you make today a bit better?",
                 "Your feelings matter. Keep tracking them."
-            ]
+            )
         }
     
+    def _load_model(self):
+        """Import transformers and build the quantized emotion classifier."""
+        import torch
+        from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+        
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // 2))
+        self._inference_mode = torch.inference_mode
+        
+        tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, use_fast=True)
+        model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+        model.eval()
+        
+        # Checkpoints differ in label casing; normalize to the upper-case names
+        # _interpret() expects while keeping the checkpoint's own index order
+        model.config.id2label = {
+            int(i): label.upper() for i, label in model.config.id2label.items()
+        }
+        model.config.label2id = {label: i for i, label in model.config.id2label.items()}
+        
+        # Generic names like LABEL_0 would map every entry to NEUTRAL and
+        # silently disable the negative-mood alerts, so refuse to run
+        labels = set(model.config.id2label.values())
+        if labels != {"NEGATIVE", "POSITIVE"}:
+            raise ValueError(
+                f"{MODEL_NAME} has labels {sorted(labels)}; expected NEGATIVE and POSITIVE."
+            )
+        
+        # int8 dynamic quantization only has CPU kernels; keep FP32 on GPU
+        use_cuda = torch.cuda.is_available()
+        if not use_cuda:
+            model = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        
+        self.emotion_analyzer = pipeline(
+            "text-classification",
+            model=model,
+            tokenizer=tokenizer,
+            device=0 if use_cuda else -1
+        )
+        self._loaded = True
+    
+    def _ensure_model(self):
+        """Load the classifier exactly once, even with concurrent callers."""
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self._load_model()
+    
+    def warmup(self):
+        """Start loading the classifier in a background thread (idempotent)."""
+        if self._loaded or self._warmup_thread is not None:
+            return
+        
+        self._warmup_thread = threading.Thread(target=self._ensure_model, daemon=True)
+        self._warmup_thread.start()
+    
+    def _run(self, inputs, **kwargs):
+        """Run the classifier without autograd, loading it on first use."""
+        self._ensure_model()
+        
+        with self._inference_mode():
+            return self.emotion_analyzer(inputs, **kwargs)
+    
+    @property
+    def df(self):
+        """Mood log as a DataFrame, rebuilt only when new rows were appended."""
+        # Read the version before snapshotting rows: a concurrent append then
+        # leaves the cache stamped older, so the next read rebuilds it. The
+        # version and frame are swapped in as one tuple so a reader never pairs
+        # one rebuild's frame with another rebuild's version.
+        version = self._version
+        cached_version, frame = self._df_state
+        if cached_version != version:
+            rows = list(self._rows)
+            frame = pd.DataFrame(rows, columns=list(DTYPES)).astype(DTYPES)
+            self._df_state = (version, frame)
+        return frame
+    
+    def signature(self):
+        """Cheap (row count, last entry date) key that changes whenever a mood is logged."""
+        return len(self._rows), (self._rows[-1]["date"] if self._rows else None)
+    
     def analyze_mood(self, entry):
         """
-        Analyze user's mood using multiple AI models.
+        Analyze user's mood using the emotion classifier.
         Returns mood label, confidence score, and personalized advice.
         """
         if not entry.strip():
             return None, 0, "Please enter your feelings to get started."
         
-        # Run sentiment analysis
-        sentiment_result = self.sentiment_analyzer(entry[:512])[0]
-        emotion_result = self.emotion_analyzer(entry[:512])[0]
+        label, confidence = self._infer(self._normalize(entry))
+        return self._interpret(label, confidence)
+    
+    def analyze_moods(self, entries):
+        """
+        Analyze a list of entries in one batched forward pass.
+        Returns a list of (mood label, confidence score, advice) tuples.
+        """
+        results = [(None, 0, "Please enter your feelings to get started.")] * len(entries)
+        valid = [i for i, entry in enumerate(entries) if entry.strip()]
+        if not valid:
+            return results
         
-        label = emotion_result['label']
-        confidence = emotion_result['score']
+        # Classify each distinct normalized text only once per batch
+        texts = list(dict.fromkeys(self._normalize(entries[i]) for i in valid))
+        emotion_results = self._run(
+            texts,
+            batch_size=32,
+            truncation=True,
+            max_length=MAX_TOKENS
+        )
+        scores = {
+            text: (emotion_result['label'], emotion_result['score'])
+            for text, emotion_result in zip(texts, emotion_results)
+        }
+        for i in valid:
+            results[i] = self._interpret(*scores[self._normalize(entries[i])])
         
+        return results
+    
+    @staticmethod
+    def _normalize(entry):
+        """Cache key for an entry; the model is uncased so this keeps predictions identical."""
+        return entry.strip().lower()
+    
+    def _classify(self, text):
+        """Run the classifier on one text and return (label, score)."""
+        emotion_result = self._run(
+            text, truncation=True, max_length=MAX_TOKENS, padding=False
+        )[0]
+        return emotion_result['label'], emotion_result['score']
+    
+    def _interpret(self, label, confidence):
+        """Map a classifier label and score to (mood label, confidence, advice)."""
         # Map model output to mood labels
         mood_label = "POSITIVE" if label == "POSITIVE" else (
             "NEGATIVE" if label == "NEGATIVE" else "NEUTRAL"
         )
         
-        # Select personalized advice
-        import random
-        advice = random.choice(self.advice_map.get(mood_label, ["Stay mindful."]))
+        # Select personalized advice (outside the cache so it stays varied)
+        advice = self._rng.choice(self.advice_map[mood_label])
         
         return mood_label, confidence, advice
     
     def log_mood(self, entry):
-        """Log mood entry to CSV with timestamp and analysis."""
+        """
+        Log mood entry to the Parquet store with timestamp and analysis.
+        Accepts a single entry or a list of entries; lists are analyzed in one batch.
+        """
+        if isinstance(entry, list):
+            return self._log_moods(entry)
+        
         mood_label, confidence, advice = self.analyze_mood(entry)
         
         if mood_label is None:
             return None, 0, advice
         
-        today = datetime.today()
-        new_entry = pd.DataFrame({
-            "date": [today],
-            "entry": [entry[:200]],  # Store truncated entry
-            "mood": [mood_label],
-            "confidence": [confidence],
-            "advice": [advice],
-            "alert_level": ["LOW"]  # Will be updated if needed
-        })
-        
-        self.df = pd.concat([self.df, new_entry], ignore_index=True)
-        self.df.to_csv(self.csv_file, index=False)
+        self._append_rows([(datetime.today(), entry, mood_label, confidence, advice)])
         
         return mood_label, confidence, advice
     
+    def _log_moods(self, entries):
+        """Batched variant of log_mood; returns one result tuple per entry."""
+        results = self.analyze_moods(entries)
+        logged = [
+            (entry, result) for entry, result in zip(entries, results)
+            if result[0] is not None
+        ]
+        
+        if logged:
+            today = datetime.today()
+            self._append_rows([(today, entry, *result) for entry, result in logged])
+        
+        return results
+    
+    def _append_rows(self, analyzed):
+        """Append (date, entry, mood, confidence, advice) rows to memory and the write buffer."""
+        rows = [
+            {
+                "date": date,
+                "entry": entry[:200],  # Store truncated entry
+                "mood": mood_label,
+                "confidence": confidence,
+                "advice": advice,
+                "alert_level": "LOW",  # Will be updated if needed
+                "mood_code": MOOD_CODES[mood_label]
+            }
+            for date, entry, mood_label, confidence, advice in analyzed
+        ]
+        
+        # The engine is shared by every Streamlit session thread
+        with self._write_lock:
+            self._rows.extend(rows)
+            self._pending.extend(rows)
+            self._version += 1
+            should_flush = len(self._pending) >= self.flush_every
+        
+        if should_flush:
+            self.flush()
+    
+    def flush(self):
+        """Write buffered entries to the store as a new Parquet part file."""
+        with self._write_lock:
+            pending, self._pending = self._pending, []
+        
+        if pending:
+            self._write_part(pd.DataFrame(pending, columns=list(DTYPES)).astype(DTYPES))
+    
+    def _write_part(self, df, root=None):
+        """
+        Append a DataFrame to the store (or `root`). Part names start with the
+        write time so they sort roughly in write order; the uuid keeps flushes
+        that share a clock tick from overwriting each other.
+        """
+        pq.write_to_dataset(
+            pa.Table.from_pandas(df, preserve_index=False),
+            root_path=root or self.store,
+            basename_template=f"{time.time_ns():020d}-{uuid.uuid4().hex}-{{i}}.parquet"
+        )
+    
+    def _compact(self, df):
+        """
+        Replace the store with a single part file. The merged file is written to
+        a side directory and swapped in by rename, so the old parts and the
+        merged copy are never visible in the store together.
+        """
+        compact, old = self.store + ".compact", self.store + ".old"
+        shutil.rmtree(compact, ignore_errors=True)
+        self._write_part(df, root=compact)
+        os.replace(self.store, old)
+        os.replace(compact, self.store)
+        shutil.rmtree(old, ignore_errors=True)
+    
+    def _recover_compaction(self):
+        """Finish or roll back a compaction interrupted by a crash."""
+        compact, old = self.store + ".compact", self.store + ".old"
+        if os.path.isdir(compact):
+            if os.path.isdir(self.store):
+                # Crashed before the swap: the old parts are still complete
+                shutil.rmtree(compact)
+            else:
+                # Crashed mid-swap: the merged copy was fully written
+                os.replace(compact, self.store)
+        shutil.rmtree(old, ignore_errors=True)
+    
     def check_alert(self):
         """
         Check for prolonged negative mood (2+ weeks).
         Returns alert status and severity.
         """
-        if len(self.df) < 7:
+        # One snapshot so concurrent appends can't mix rows from two frames
+        df = self.df
+        if len(df) < 7:
             return False, "LOW", "Not enough data yet."
         
+        # Imported here so numba's JIT import stays off the first page paint
+        from backend_kernels import alert_stats
+        
         # Analyze last 14 days
         fourteen_days_ago = datetime.today() - timedelta(days=14)
-        recent_df = self.df[self.df['date'] >= fourteen_days_ago]
+        start = self._first_index_since(df, fourteen_days_ago)
+        negative_count, neutral_count, positive_count = alert_stats(
+            df['date'].values[start:].view('i8'),
+            df['mood_code'].values[start:],
+            np.datetime64(fourteen_days_ago, 'ns').astype(np.int64)
+        )
+        total_count = negative_count + neutral_count + positive_count
         
-        if len(recent_df) < 7:
+        if total_count < 7:
             return False, "LOW", "Not enough data for 2-week analysis."
         
-        negative_count = sum(recent_df['mood'] == "NEGATIVE")
-        total_count = len(recent_df)
         negative_percentage = (negative_count / total_count) * 100
         
         # Alert logic
@@ -130,27 +405,26 @@ class MoodChatAI:
     
     def get_mood_stats(self):
         """Generate mood statistics for dashboard."""
-        if len(self.df) == 0:
-            return {
-                "total_entries": 0,
-                "positive_days": 0,
-                "negative_days": 0,
-                "neutral_days": 0,
-                "trend": "No data"
-            }
+        # Every aggregate comes from the int8 mood codes and float32 confidences
+        # of one frame snapshot; shift mood_code (-1/0/1) to bincount indices 0/1/2
+        df = self.df
+        codes = df['mood_code'].values + 1
+        confs = df['confidence'].values
+        total = codes.size
         
-        total = len(self.df)
-        positive = sum(self.df['mood'] == "POSITIVE")
-        negative = sum(self.df['mood'] == "NEGATIVE")
-        neutral = sum(self.df['mood'] == "NEUTRAL")
+        # Bincount: 0/1/2 -> negative/neutral/positive
+        counts = np.bincount(codes, minlength=3)
+        negative, neutral, positive = (int(n) for n in counts)
         
-        # Calculate trend
-        if len(self.df) >= 2:
-            recent = self.df.tail(7)['mood'].value_counts()
-            past = self.df.iloc[:-7]['mood'].value_counts()
+        # Calculate trend: last 7 entries vs. everything before them
+        if total == 0:
+            trend = "No data"
+        elif total >= 2:
+            recent = np.bincount(codes[-7:], minlength=3)
+            past = counts - recent
             
-            recent_positive = recent.get("POSITIVE", 0) / len(self.df.tail(7))
-            past_positive = past.get("POSITIVE", 0) / len(self.df.iloc[:-7]) if len(self.df.iloc[:-7]) > 0 else 0
+            recent_positive = recent[2] / max(recent.sum(), 1)
+            past_positive = past[2] / max(past.sum(), 1)
             
             trend = "Improving 📈" if recent_positive > past_positive else (
                 "Declining 📉" if recent_positive < past_positive else "Stable ➡️"
@@ -165,14 +439,19 @@ class MoodChatAI:
             "neutral_days": neutral,
             "positive_percentage": round((positive / total) * 100, 1) if total > 0 else 0,
             "trend": trend,
-            "avg_confidence": round(self.df['confidence'].mean(), 3) if len(self.df) > 0 else 0
+            "avg_confidence": round(float(confs.mean()), 3) if total > 0 else 0
         }
     
     def get_mood_history(self, days=30):
         """Get mood history for the last N days."""
         cutoff = datetime.today() - timedelta(days=days)
-        history = self.df[self.df['date'] >= cutoff].sort_values('date')
-        return history
+        df = self.df
+        return df.iloc[self._first_index_since(df, cutoff):]
+    
+    @staticmethod
+    def _first_index_since(df, cutoff):
+        """Position of the first entry in df at or after cutoff; the log is kept sorted by date."""
+        return int(np.searchsorted(df['date'].values, np.datetime64(cutoff, 'ns')))
     
     def export_report(self):
         """Export comprehensive mental health report."""
@@ -205,6 +484,21 @@ class MoodChatAI:
             return "Your mood is balanced. Keep tracking and stay mindful!"
 
 
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """
+    Process-wide MoodChatAI instance, created on first call.
+    Lives at module level so it survives Streamlit reruns of the app script.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = MoodChatAI()
+    return _engine
+
+
 # ============= MAIN DEMO & TESTING =============
 if __name__ == "__main__":
     ai = MoodChatAI()
@@ -221,8 +515,7 @@ if __name__ == "__main__":
     print("🧠 Mood-Chat AI Backend Demo\n")
     print("=" * 50)
     
-    for entry in sample_entries:
-        mood, confidence, advice = ai.log_mood(entry)
+    for entry, (mood, confidence, advice) in zip(sample_entries, ai.log_mood(sample_entries)):
         print(f"\n📝 Entry: {entry[:50]}...")
         print(f"🎭 Mood: {mood} (Confidence: {confidence:.2f})")
         print(f"💡 Advice: {advice}")
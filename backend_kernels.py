@@ -0,0 +1,28 @@
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to plain Python loops
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def alert_stats(dates_ns, codes, cutoff_ns):
+    """
+    Count negative, neutral and positive entries dated at or after cutoff_ns.
+    Dates are int64 nanosecond timestamps; codes are int8 mood codes (-1/0/1).
+    """
+    negative = 0
+    neutral = 0
+    positive = 0
+    for i in range(dates_ns.shape[0]):
+        if dates_ns[i] >= cutoff_ns:
+            code = codes[i]
+            if code < 0:
+                negative += 1
+            elif code > 0:
+                positive += 1
+            else:
+                neutral += 1
+    return negative, neutral, positive